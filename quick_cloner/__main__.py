@@ -14,6 +14,10 @@ def parse_args(argv):
     p.add_argument("--pat-env", default="AZDO_PAT", help="Environment variable containing the PAT")
     p.add_argument("--concurrency", type=int, default=4, help="Max concurrent clones")
     p.add_argument("--pat-username", default=os.environ.get("AZDO_PAT_USER", "azdo"), help="Username to use when embedding PAT")
+    p.add_argument("--depth", type=int, default=1, help="Shallow clone depth (0 for full history)")
+    p.add_argument("--filter", default="blob:none", help="Partial clone filter spec (empty to disable)")
+    p.add_argument("--full-history", action="store_true", help="Clone full history (same as --depth 0)")
+    p.add_argument("--no-cache", action="store_true", help="Ignore and don't write the local repo/ETag caches")
     return p.parse_args(argv)
 
 def main(argv):
@@ -40,6 +44,9 @@ def main(argv):
         base_url=args.base_url,
         concurrency=args.concurrency,
         pat_username=args.pat_username,
+        depth=0 if args.full_history else args.depth,
+        clone_filter=args.filter or None,
+        use_cache=not args.no_cache,
     )
     app.run()
     return 0
@@ -19,10 +19,14 @@ Key controls:
 """
 
 import anyio
+import asyncio
+import heapq
+import os
 import sys
 import httpx
+from collections import deque
 from pathlib import Path
-from typing import List, Tuple, Any
+from typing import List, Optional, Tuple, Any
 
 from textual.app import App, ComposeResult
 from textual.binding import Binding
@@ -38,10 +42,11 @@ from textual.widgets import (
     Log,
 )
 
-from .azdo import AzDoClient
-from .clone import CloneWorker
-from .utils import mask_pat
-from .models import Repo
+from .azdo import DEFAULT_CACHE_PATH, AzDoClient, make_http_client
+from .cache import load_cached, save_cached
+from .clone import TMP_PREFIX, CloneWorker
+from .utils import make_masker
+from .models import Repo, repo_sort_key
 from .log import _LogStream
 from textual.events import Key
 
@@ -72,7 +77,18 @@ class AzDoCloneApp(App):
             self.repos = repos
             super().__init__()
 
-    def __init__(self, org: str, pat: str, dest: Path, base_url: str, concurrency: int, pat_username: str):
+    def __init__(
+        self,
+        org: str,
+        pat: str,
+        dest: Path,
+        base_url: str,
+        concurrency: int,
+        pat_username: str,
+        depth: int = 1,
+        clone_filter: Optional[str] = "blob:none",
+        use_cache: bool = True,
+    ):
         super().__init__()
         self.org = org
         self.pat = pat
@@ -80,11 +96,25 @@ class AzDoCloneApp(App):
         self.base_url = base_url
         self.concurrency = concurrency
         self.pat_username = pat_username
+        self.depth = depth
+        self.clone_filter = clone_filter
+        self.use_cache = use_cache
+        self._mask = make_masker(pat)
 
         # Internal state
         self.all_repos: List[Repo] = []
         self.filtered_repos: List[Repo] = []
+        # Table rows are keyed by str(index into all_repos); selected_rows maps that index to its row key
         self.selected_rows: dict[int, Any] = {}
+        self._match_texts: Tuple[str, ...] = ()
+        self._match_bytes: List[bytes] = []
+        # Prebuilt table cells per repo; only the checkbox cell [0] changes on selection
+        self._row_cells: List[List[str]] = []
+        self._visible: set[int] = set()
+        self._filter_task: asyncio.Task | None = None
+        self._log_queue: deque[str] = deque()
+        self._load_task: asyncio.Task | None = None
+        self._http: httpx.AsyncClient | None = None
 
     def compose(self) -> ComposeResult:
         """Builds the widget tree for the app."""
@@ -117,13 +147,31 @@ class AzDoCloneApp(App):
         # Redirect stdout/stderr to the Log widget so plain prints show up there
         self._orig_stdout = sys.stdout
         self._orig_stderr = sys.stderr
-        sys.stdout = _LogStream(self, mask_fn=mask_pat, secret=self.pat, tee=self._orig_stdout)
-        sys.stderr = _LogStream(self, mask_fn=mask_pat, secret=self.pat, tee=self._orig_stderr)
-        await self.load_data()
+        sys.stdout = _LogStream(self, mask_fn=self._mask, tee=self._orig_stdout, queue=self._log_queue)
+        sys.stderr = _LogStream(self, mask_fn=self._mask, tee=self._orig_stderr, queue=self._log_queue)
+        # Safety net for lines whose drain could not be scheduled
+        self.set_interval(0.05, self._drain_log)
+        # One pooled client for the app's lifetime so connections survive refreshes
+        self._http = make_http_client(self.pat)
+        cached = load_cached(self.org, self.base_url) if self.use_cache else None
+        if cached:
+            # Show the cached list right away and refresh from Azure DevOps in the background
+            await self._set_repos(cached)
+            print(f"Loaded {len(cached)} cached repositories. Refreshing…")
+            self._load_task = asyncio.create_task(self.load_data())
+        else:
+            await self.load_data()
         self.filter_input.focus()
 
     async def on_unmount(self) -> None:
-        """Restore original stdio when the app exits."""
+        """Restore original stdio and close the HTTP client when the app exits."""
+        if self._filter_task is not None:
+            self._filter_task.cancel()
+        if self._load_task is not None:
+            self._load_task.cancel()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
         try:
             if hasattr(self, "_orig_stdout") and self._orig_stdout is not None:
                 sys.stdout = self._orig_stdout  # type: ignore[assignment]
@@ -136,62 +184,140 @@ class AzDoCloneApp(App):
         """Fetch projects and repos from Azure DevOps and populate the table."""
         print(f"Fetching projects/repos from {self.base_url} for org '{self.org}'…")
         try:
-            async with AzDoClient(self.org, self.pat, self.base_url) as client:
-                projects = await client.list_projects()
-                print(f"Found {len(projects)} projects. Fetching repos…")
-                repos: List[Repo] = []
-
+            async with AzDoClient(
+                self.org,
+                self.pat,
+                self.base_url,
+                client=self._http,
+                cache_path=DEFAULT_CACHE_PATH if self.use_cache else None,
+            ) as client:
                 async def fetch_project(project_name: str):
                     rs = await client.list_repos_for_project(project_name)
                     if not rs:
                         print(f"No access or no repos in project: {project_name}")
                     return rs
 
-                async with anyio.create_task_group() as tg:
-                    results: List[List[Repo]] = []
-
-                    async def add_for(pname: str):
-                        rs = await fetch_project(pname)
-                        results.append(rs)
+                # Cap in-flight project requests so large orgs don't trip rate limits
+                limiter = anyio.CapacityLimiter(self.concurrency * 2)
+                results: List[List[Repo]] = []
+                failed: List[str] = []
 
-                    for p in projects:
-                        pname = p.get("name")
-                        if pname:
-                            tg.start_soon(add_for, pname)
+                # Set if project paging fails; re-raised once the group has exited
+                paging_error: Optional[Exception] = None
 
-                for group in results:
-                    repos.extend(group)
+                # Repo fetches start as soon as each project is yielded, overlapping project paging
+                async with anyio.create_task_group() as tg:
 
-            self.all_repos = sorted(repos, key=lambda r: (r.project_name.lower(), r.repo_name.lower()))
-            await self.refresh_table()
+                    async def add_for(i: int, pname: str):
+                        # Failures stay in their slot so one project can't cancel the rest
+                        async with limiter:
+                            try:
+                                results[i] = await fetch_project(pname)
+                            except Exception as e:
+                                print(f"Error fetching repos for project {pname}: {e}")
+                                failed.append(pname)
+                                # Keep what we already had for this project rather than dropping it
+                                results[i] = [r for r in self.all_repos if r.project_name == pname]
+
+                    async def page_projects():
+                        # Runs as a task so its errors don't surface as an ExceptionGroup
+                        nonlocal paging_error
+                        try:
+                            async for p in client.iter_projects():
+                                pname = p.get("name")
+                                if pname:
+                                    results.append([])
+                                    tg.start_soon(add_for, len(results) - 1, pname)
+                        except Exception as e:
+                            paging_error = e
+                            tg.cancel_scope.cancel()
+                            return
+                        print(f"Found {len(results)} projects. Fetching repos…")
+
+                    tg.start_soon(page_projects)
+
+                if paging_error is not None:
+                    raise paging_error
+
+            repos = list(heapq.merge(*results, key=repo_sort_key))
+            if repos != self.all_repos:
+                await self._set_repos(repos)
+            # Never overwrite a good cache with a partial list
+            if self.use_cache and not failed:
+                save_cached(self.org, self.base_url, repos)
+            elif failed:
+                print(f"{len(failed)} project(s) failed to load; kept their previous repos and skipped the cache update.")
             print(f"Loaded {len(self.all_repos)} repositories.")
         except httpx.HTTPStatusError as e:
             print(f"HTTP error: {e.response.status_code} {e.response.text}")
         except Exception as e:
             print(f"Error: {e}")
 
-    async def refresh_table(self) -> None:
-        """Refresh the repo DataTable based on current filter."""
+    async def _set_repos(self, repos: List[Repo]) -> None:
+        """Replace the repo list, carrying selections over by project/repo name."""
+        selected = {self.all_repos[i].match_text for i in self.selected_rows}
+        self.all_repos = repos
+        self._match_texts = tuple(r.match_text for r in repos)
+        self._match_bytes = [m.encode() for m in self._match_texts]
+        self.selected_rows = {i: str(i) for i, m in enumerate(self._match_texts) if m in selected}
+        self._row_cells = [
+            ["✔" if i in self.selected_rows else " ", r.project_name, r.repo_name, r.default_branch or ""]
+            for i, r in enumerate(repos)
+        ]
+        await self.refresh_table(rebuild=True)
+
+    async def refresh_table(self, rebuild: bool = False) -> None:
+        """Refresh the repo DataTable based on current filter.
+
+        When the filter only narrows the visible set, the rows that drop out are
+        removed in place; otherwise the table is rebuilt so ordering is kept.
+        """
         filt = self.filter_input.value.strip().lower()
-        if filt:
-            self.filtered_repos = [r for r in self.all_repos if filt in r.match_text()]
+        if filt and filt.isascii():
+            # An ASCII needle can't match inside a multi-byte UTF-8 sequence, so bytes search is exact
+            needle = filt.encode()
+            visible = [i for i, m in enumerate(self._match_bytes) if needle in m]
+        elif filt:
+            visible = [i for i, m in enumerate(self._match_texts) if filt in m]
         else:
-            self.filtered_repos = list(self.all_repos)
-
-        self.table.clear()
-        self.selected_rows.clear()
-
-        for idx, r in enumerate(self.filtered_repos):
-            self.table.add_row(" ", r.project_name, r.repo_name, r.default_branch or "", key=idx)
-
-
-    async def select_row(self, row_index, row_key):
-        if row_index in self.selected_rows:
-            self.selected_rows.pop(row_index)
-            self.table.update_cell(row_key, self.column_keys[0], " " )
+            visible = list(range(len(self.all_repos)))
+        visible_set = set(visible)
+        self.filtered_repos = [self.all_repos[i] for i in visible]
+
+        # Selections only survive while their row stays visible
+        for i in [i for i in self.selected_rows if i not in visible_set]:
+            del self.selected_rows[i]
+            self._row_cells[i][0] = " "
+
+        leaving = self._visible - visible_set
+        # Coalesce all row mutations into a single repaint
+        with self.batch_update():
+            if not rebuild and visible_set <= self._visible and len(leaving) <= len(visible_set):
+                for i in leaving:
+                    self.table.remove_row(str(i))
+            else:
+                self.table.clear()
+                # add_rows can't take row keys, and rows are keyed by repo index, so add one at a time
+                row_cells = self._row_cells
+                add_row = self.table.add_row
+                for i in visible:
+                    add_row(*row_cells[i], key=str(i))
+        self._visible = visible_set
+
+    async def _debounced_refresh(self) -> None:
+        await anyio.sleep(0.12)
+        await self.refresh_table()
+
+    async def select_row(self, row_key):
+        repo_index = int(row_key.value)
+        if repo_index in self.selected_rows:
+            self.selected_rows.pop(repo_index)
+            mark = " "
         else:
-            self.selected_rows[row_index] = row_key
-            self.table.update_cell(row_key, self.column_keys[0], "✔" )
+            self.selected_rows[repo_index] = row_key
+            mark = "✔"
+        self._row_cells[repo_index][0] = mark
+        self.table.update_cell(row_key, self.column_keys[0], mark)
 
     async def action_refresh(self) -> None:
         await self.load_data()
@@ -200,12 +326,15 @@ class AzDoCloneApp(App):
         self.filter_input.focus()
 
     async def action_select_all(self) -> None:
-        for row_index, row_key in enumerate(self.table.rows):
-            await self.select_row(row_index, row_key)
+        for row_key in list(self.table.rows):
+            await self.select_row(row_key)
 
     async def on_input_changed(self, event: Input.Changed) -> None:
         if event.input is self.filter_input:
-            await self.refresh_table()
+            # Coalesce rapid keystrokes into a single table refresh
+            if self._filter_task is not None:
+                self._filter_task.cancel()
+            self._filter_task = asyncio.create_task(self._debounced_refresh())
 
     async def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
         """Toggle selection when a row is activated (Enter/Space or click)."""
@@ -215,9 +344,7 @@ class AzDoCloneApp(App):
                 print(f"Nothing to happen {event}")
                 return
 
-            row_index = self.table.get_row_index(row_key)
-
-            await self.select_row(row_index, row_key)
+            await self.select_row(row_key)
 
         except Exception as e:
             print(f"Selection error: {e}")
@@ -240,8 +367,13 @@ class AzDoCloneApp(App):
             return
         dest_path = Path(self.dest_input.value).expanduser().resolve()
         dest_path.mkdir(parents=True, exist_ok=True)
+        # One directory scan up front instead of a stat per repo. Clones are renamed
+        # into place only when complete, so a matching directory name is enough.
+        # Temp dirs may belong to clones still running in another process, so leave them alone.
+        with os.scandir(dest_path) as it:
+            existing = {e.name for e in it if e.is_dir() and not e.name.startswith(TMP_PREFIX)}
 
-        to_clone = [self.filtered_repos[i] for i in sorted(self.selected_rows)]
+        to_clone = [self.all_repos[i] for i in sorted(self.selected_rows)]
         print(f"Cloning {len(to_clone)} repos into {dest_path} with concurrency={self.concurrency}…")
 
         worker = CloneWorker(
@@ -249,42 +381,48 @@ class AzDoCloneApp(App):
             concurrency=self.concurrency,
             pat_username=self.pat_username,
             pat=self.pat,
+            depth=self.depth,
+            clone_filter=self.clone_filter,
         )
 
         successes = 0
         failures = 0
 
         async def log_cb(line: str):
-            masked = mask_pat(line, self.pat)
-            print(masked)
+            print(self._mask(line))
+
+        results: List[Optional[Tuple[Repo, int]]] = [None] * len(to_clone)
 
         async with anyio.create_task_group() as tg:
-            results: List[Tuple[Repo, int]] = []
 
-            async def run_clone(r: Repo):
-                res = await worker.clone_one(r, log_cb)
-                results.append(res)
+            async def run_clone(i: int, r: Repo):
+                try:
+                    results[i] = await worker.clone_one(r, log_cb, already_cloned=r.repo_name in existing)
+                except Exception as e:
+                    print(f"Error cloning {r.project_name}/{r.repo_name}: {self._mask(str(e))}")
 
-            for r in to_clone:
-                tg.start_soon(run_clone, r)
+            for i, r in enumerate(to_clone):
+                tg.start_soon(run_clone, i, r)
 
-        for _, rc in results:
-            if rc == 0:
+        for res in results:
+            if res is not None and res[1] == 0:
                 successes += 1
             else:
                 failures += 1
 
         print(f"Done. Success: {successes}, Failures: {failures}.")
 
-    def _log_line(self, line: str) -> None:
+    def _drain_log(self, max_lines: int = 500) -> None:
+        """Render queued log lines in one write; runs on the UI thread."""
+        q = self._log_queue
+        if not q:
+            return
+        lines = [q.popleft() for _ in range(min(max_lines, len(q)))]
         try:
             log_widget = getattr(self, "log_widget", None)
             if log_widget is None:
                 return
-            if hasattr(log_widget, "write_line"):
-                log_widget.write_line(line)
-            elif hasattr(log_widget, "write"):
-                log_widget.write(line + "\n")
+            log_widget.write("\n".join(lines) + "\n")
         except Exception:
             # Don't let logging failures crash the UI
             pass
@@ -1,50 +1,132 @@
+import json
+import os
 import httpx
 
-from typing import Dict, List
-from .models import Repo
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from .cache import CACHE_DIR
+from .models import Repo, repo_sort_key
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is optional at runtime
+    _loads = json.loads
 
 API_VERSION_PROJECTS = "7.1-preview.4"
 API_VERSION_REPOS = "7.1-preview.1"
 
+DEFAULT_CACHE_PATH = CACHE_DIR / "azdo.json"
+
+
+def make_http_client(pat: str) -> httpx.AsyncClient:
+    """Build the shared HTTP/2 client used for all Azure DevOps calls."""
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=30.0),
+        timeout=httpx.Timeout(30.0, connect=10.0),
+        headers={"Accept": "application/json", "Accept-Encoding": "gzip"},
+        auth=("", pat),
+    )
 
 
 class AzDoClient:
 
-    def __init__(self, org: str, pat: str, base_url: str = "https://dev.azure.com"):
+    def __init__(
+        self,
+        org: str,
+        pat: str,
+        base_url: str = "https://dev.azure.com",
+        client: Optional[httpx.AsyncClient] = None,
+        cache_path: Optional[Path] = DEFAULT_CACHE_PATH,
+    ):
         self.org = org
         self.pat = pat
         self.base_url = base_url.rstrip("/")
-        self._client = None
+        self._client = client
+        # Only close the client on exit if we created it ourselves
+        self._owns_client = client is None
+        # url -> (etag, [data, continuation token]); pass cache_path=None to disable
+        self.cache_path = cache_path
+        self._cache: Dict[str, Tuple[str, Any]] = {}
+        self._cache_dirty = False
 
 
     async def __aenter__(self):
-            self._client = httpx.AsyncClient(
-            timeout=30.0,
-            headers={"Accept": "application/json"},
-            auth=("", self.pat),
-            )
+            if self._client is None:
+                self._client = make_http_client(self.pat)
+            self._load_cache()
             return self
 
     async def __aexit__(self, *args):
-        if self._client:
+        self._save_cache()
+        if self._client and self._owns_client:
             await self._client.aclose()
+            self._client = None
 
+    def _load_cache(self) -> None:
+        if self.cache_path is None:
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            self._cache = {url: (etag, payload) for url, (etag, payload) in raw.items()}
+        except (OSError, ValueError, TypeError):
+            # Missing or corrupt cache just means every request goes to the server
+            self._cache = {}
 
-    async def list_projects(self) -> List[Dict]:
+    def _save_cache(self) -> None:
+        if self.cache_path is None or not self._cache_dirty:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._cache, f)
+            os.replace(tmp, self.cache_path)
+            self._cache_dirty = False
+        except OSError:
+            pass
+
+    async def _get_json(self, url: str, *, missing_ok: bool = False) -> Optional[Tuple[Dict, Optional[str]]]:
+        """GET `url` and return (data, continuation token).
+
+        Sends If-None-Match when an ETag is cached and reuses the cached payload on 304.
+        Returns None for 401/403 when `missing_ok` is set.
+        """
+        assert self._client
+        cached = self._cache.get(url)
+        headers = {"If-None-Match": cached[0]} if cached else None
+        r = await self._client.get(url, headers=headers)
+        if r.status_code == 304 and cached:
+            data, cont = cached[1]
+            return data, cont
+        if missing_ok and r.status_code in (401, 403):
+            return None
+        r.raise_for_status()
+        data = _loads(r.content)
+        cont = r.headers.get("x-ms-continuationtoken")
+        etag = r.headers.get("etag")
+        if etag:
+            self._cache[url] = (etag, [data, cont])
+            self._cache_dirty = True
+        return data, cont
+
+
+    async def iter_projects(self) -> AsyncIterator[Dict]:
+        """Yield projects as each page arrives, before the next page is requested."""
         assert self._client
         url = f"{self.base_url}/{self.org}/_apis/projects?api-version={API_VERSION_PROJECTS}"
-        projects: List[Dict] = []
         while True:
-            r = await self._client.get(url)
-            r.raise_for_status()
-            data = r.json()
-            projects.extend(data.get("value", []))
-            cont = r.headers.get("x-ms-continuationtoken")
+            data, cont = await self._get_json(url)  # type: ignore[misc] | only None when missing_ok
+            for project in data.get("value", []):
+                yield project
             if not cont:
                 break
             url = f"{self.base_url}/{self.org}/_apis/projects?api-version={API_VERSION_PROJECTS}&$top=1000&continuationToken={cont}"
 
-        return projects
+    async def list_projects(self) -> List[Dict]:
+        return [p async for p in self.iter_projects()]
 
     async def list_repos_for_project(self, project: str) -> List[Repo]:
         """Return repos for a given project (name or id)."""
@@ -52,11 +134,10 @@ class AzDoClient:
         url = f"{self.base_url}/{self.org}/{project}/_apis/git/repositories?api-version={API_VERSION_REPOS}&$top=1000"
         repos: List[Repo] = []
         while True:
-            r = await self._client.get(url)
-            if r.status_code in (401, 403):
+            res = await self._get_json(url, missing_ok=True)
+            if res is None:
                 return []
-            r.raise_for_status()
-            data = r.json()
+            data, cont = res
             for item in data.get("value", []):
                 repos.append(
                     Repo(
@@ -66,8 +147,9 @@ class AzDoClient:
                         default_branch=item.get("defaultBranch"),
                         )
                     )
-            cont = r.headers.get("x-ms-continuationtoken")
             if not cont:
                 break
             url = f"{self.base_url}/{self.org}/{project}/_apis/git/repositories?api-version={API_VERSION_REPOS}&$top=1000&continuationToken={cont}"
+        # Sorted per project so the app can merge results instead of re-sorting everything
+        repos.sort(key=repo_sort_key)
         return repos
@@ -0,0 +1,62 @@
+"""On-disk cache of the repo list per org, so the TUI can render before Azure DevOps answers."""
+
+import hashlib
+import json
+import os
+import re
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import List, Optional
+
+from .models import Repo
+
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is optional at runtime
+    _dumps = lambda obj: json.dumps(obj).encode("utf-8")
+    _loads = json.loads
+
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "quick_cloner"
+CACHE_TTL = 12 * 60 * 60
+
+
+def _cache_file(org: str, base_url: str) -> Path:
+    # Orgs aren't unique across servers (e.g. DefaultCollection on Azure DevOps Server)
+    safe = re.sub(r"[^A-Za-z0-9._-]", "_", org)
+    digest = hashlib.sha1(f"{base_url.rstrip('/')}|{org}".encode("utf-8")).hexdigest()[:12]
+    return CACHE_DIR / f"{safe}-{digest}.repos.json"
+
+
+def _to_dict(repo: Repo) -> dict:
+    d = asdict(repo)
+    del d["match_text"]
+    return d
+
+
+def load_cached(org: str, base_url: str, ttl: float = CACHE_TTL) -> Optional[List[Repo]]:
+    """Return the cached repos for `org` on `base_url`, or None if missing, stale or unreadable."""
+    try:
+        with open(_cache_file(org, base_url), "rb") as f:
+            data = _loads(f.read())
+        if time.time() - data["saved_at"] > ttl:
+            return None
+        # match_text is derived by Repo itself; ignore any copy from older cache files
+        return [Repo(**{k: v for k, v in item.items() if k != "match_text"}) for item in data["repos"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_cached(org: str, base_url: str, repos: List[Repo]) -> None:
+    """Atomically write `repos` to the cache for `org` on `base_url`; errors are ignored."""
+    path = _cache_file(org, base_url)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(_dumps({"saved_at": time.time(), "repos": [_to_dict(r) for r in repos]}))
+        os.replace(tmp, path)
+    except OSError:
+        pass
@@ -1,52 +1,144 @@
+import anyio
 import asyncio
 import os
 import shlex
+import shutil
+import signal
+import time
+import uuid
 from pathlib import Path
-from typing import Callable, Awaitable
+from types import MappingProxyType
+from typing import Callable, Awaitable, Optional
 
 from .models import Repo
-from .utils import embed_pat_in_url, mask_pat
+from .utils import embed_pat_in_url, make_masker
+
+TMP_PREFIX = ".quickcloner-tmp-"
+# Git output is forwarded to log_cb in batches of at most this many lines, and no later than this after a line arrives
+LOG_BATCH_LINES = 64
+LOG_BATCH_SECONDS = 0.1
 
 
 class CloneWorker:
-    """Clones repos with embedded PAT. Skips repos that already exist."""
+    """Clones repos with embedded PAT. Skips repos that already exist.
+
+    Each clone goes into a temporary directory under dest and is renamed into
+    place only on success, so a directory named after a repo is always complete.
+    """
 
-    def __init__(self, dest: Path, concurrency: int = 4, *, pat_username: str = "azdo", pat: str = ""):
+    def __init__(
+        self,
+        dest: Path,
+        concurrency: int = 4,
+        *,
+        pat_username: str = "azdo",
+        pat: str = "",
+        depth: int = 1,
+        clone_filter: Optional[str] = "blob:none",
+    ):
         self.dest = dest
-        self.sem = asyncio.Semaphore(concurrency)
+        self.sem = anyio.Semaphore(concurrency)
         self.pat_username = pat_username
         self.pat = pat
+        self._mask = make_masker(pat)
+        self.depth = depth
+        self.clone_filter = clone_filter
+        # Built once and shared read-only by every clone; the subprocess layer copies it on spawn
+        self._env = MappingProxyType({"GIT_TERMINAL_PROMPT": "0", "GIT_CONFIG_NOSYSTEM": "1", **os.environ})
 
-    async def clone_one(self, repo: Repo, log_cb: Callable[[str], Awaitable[None]]):
+    async def clone_one(
+        self,
+        repo: Repo,
+        log_cb: Callable[[str], Awaitable[None]],
+        already_cloned: Optional[bool] = None,
+    ):
+        """Clone `repo` into dest. Pass `already_cloned` from a batch scan to skip the per-repo stat."""
         target = self.dest / repo.repo_name
 
+        if already_cloned is None:
+            already_cloned = os.path.isdir(target)
+
         # Skip if already cloned
-        if (target / ".git").exists():
+        if already_cloned:
             await log_cb(f"→ SKIP {repo.project_name}/{repo.repo_name}: already exists")
             return repo, 0
 
         remote_url = embed_pat_in_url(repo.remote_url, self.pat_username, self.pat)
-        cmd = ["git", "clone", "--origin", "origin", remote_url, str(target)]
+        cmd = ["git", "-c", "protocol.version=2", "-c", "fetch.parallel=0", "clone"]
+        if self.depth:
+            cmd += ["--depth", str(self.depth), "--single-branch"]
+        if self.clone_filter:
+            cmd += ["--filter", self.clone_filter]
+        tmp = self.dest / f"{TMP_PREFIX}{uuid.uuid4().hex}"
+        cmd += ["--origin", "origin", remote_url, str(tmp)]
 
-        env = os.environ.copy()
-        env.setdefault("GIT_TERMINAL_PROMPT", "0")
-
-        masked_cmd = mask_pat(" ".join(shlex.quote(c) for c in cmd), self.pat)
-        await log_cb(f"→ CLONE {repo.project_name}/{repo.repo_name}: {masked_cmd}")
+        masked_cmd = self._mask(" ".join(shlex.quote(c) for c in cmd))
+        await log_cb(f"→ CLONE {repo.project_name}/{repo.repo_name} into {target}: {masked_cmd}")
 
         async with self.sem:
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.STDOUT,
-                env=env,
-            )
-            stdout, _ = await proc.communicate()
-            out = stdout.decode(errors="replace")
-            rc = proc.returncode
-            for line in out.splitlines():
-                await log_cb(f" {mask_pat(line, self.pat)}")
+            proc: Optional[asyncio.subprocess.Process] = None
+            moved = False
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,
+                    env=self._env,
+                    # Own session so terminal signals aimed at the TUI don't half-kill child gits
+                    start_new_session=True,
+                    close_fds=True,
+                )
+                assert proc.stdout is not None
+                # Stream output as it arrives, handing it to log_cb in small batches
+                lines: list[str] = []
+                last_flush = time.monotonic()
+                while True:
+                    # While output is pending, wait no longer than the batch window so a quiet stream still flushes
+                    timeout = max(0.0, last_flush + LOG_BATCH_SECONDS - time.monotonic()) if lines else None
+                    raw: Optional[bytes] = None
+                    with anyio.move_on_after(timeout):
+                        raw = await proc.stdout.readline()
+                    if raw == b"":
+                        break
+                    if raw is not None:
+                        line = raw.decode(errors="replace").rstrip("\r\n")
+                        lines.append(f" {self._mask(line)}")
+                    now = time.monotonic()
+                    if lines and (len(lines) >= LOG_BATCH_LINES or now - last_flush >= LOG_BATCH_SECONDS):
+                        await log_cb("\n".join(lines))
+                        lines.clear()
+                        last_flush = now
+                rc = await proc.wait()
+                if lines:
+                    await log_cb("\n".join(lines))
+
+                if rc == 0:
+                    try:
+                        os.replace(tmp, target)
+                        moved = True
+                    except OSError as e:
+                        await log_cb(f" Could not move clone into {target}: {e}")
+                        rc = 1
+            finally:
+                # On failure, cancellation or any error: stop git and drop the partial clone
+                if not moved:
+                    with anyio.CancelScope(shield=True):
+                        await self._discard(proc, tmp)
 
             status = "OK" if rc == 0 else f"FAIL({rc})"
             await log_cb(f"← CLONE {repo.project_name}/{repo.repo_name}: {status}\n")
             return repo, rc
+
+    async def _discard(self, proc: Optional[asyncio.subprocess.Process], tmp: Path) -> None:
+        """Kill a still-running clone (and its helpers) and remove its temp directory."""
+        if proc is not None and proc.returncode is None:
+            try:
+                if hasattr(os, "killpg"):
+                    # git runs as its own session leader, so this also reaps git-remote-https etc.
+                    os.killpg(proc.pid, signal.SIGKILL)
+                else:
+                    proc.kill()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+        await anyio.to_thread.run_sync(shutil.rmtree, tmp, True)
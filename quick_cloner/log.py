@@ -1,23 +1,34 @@
+import threading
+from collections import deque
 from textual.app import App
-from typing import Optional
+from typing import Callable, Deque, Optional
 
 class _LogStream:
     """A lightweight stream that forwards print output to the app's Log widget.
 
-    - Buffers partial writes until a newline, then emits a line to the Log.
-    - Optionally masks a secret (PAT) using a provided mask function.
+    - Buffers partial writes until a newline, then queues the line for the Log.
+    - Optionally masks secrets (PAT) using a provided mask function, before queueing.
+    - Lines are rendered in batches by the app's `_drain_log` on the UI thread.
     - Optionally tees output to the original stream (so console still shows text).
     """
 
-    def __init__(self, app: "App", mask_fn=None, secret: Optional[str] = None, tee=None) -> None:
+    def __init__(
+        self,
+        app: "App",
+        mask_fn: Optional[Callable[[str], str]] = None,
+        tee=None,
+        queue: Optional[Deque[str]] = None,
+    ) -> None:
         self.app = app
         self.mask_fn = mask_fn
-        self.secret = secret
         self.tee = tee
         self._buffer: str = ""
+        # Share one queue between stdout and stderr to keep their relative order
+        self._q: Deque[str] = queue if queue is not None else deque()
+        self._ui_thread = threading.get_ident()
 
-        if not hasattr(app, "_log_line") or not callable(getattr(app, "_log_line", None)):
-            raise AttributeError("App must have a callable '_log_line' method")
+        if not hasattr(app, "_drain_log") or not callable(getattr(app, "_drain_log", None)):
+            raise AttributeError("App must have a callable '_drain_log' method")
 
     def write(self, data: str) -> int:
         try:
@@ -47,10 +58,18 @@ class _LogStream:
 
     def _emit(self, line: str) -> None:
         try:
-            if self.secret and self.mask_fn:
-                line = self.mask_fn(line, self.secret)
-            self.app._log_line(line) # type: ignore | We validate this in the init if the call back exists
+            if self.mask_fn:
+                line = self.mask_fn(line)
+            was_empty = not self._q
+            self._q.append(line)
+            # Only the first line of a batch schedules a drain; the rest ride along
+            if was_empty:
+                if threading.get_ident() == self._ui_thread:
+                    self.app.call_later(self.app._drain_log) # type: ignore | We validate this in the init if the call back exists
+                else:
+                    self.app.call_from_thread(self.app._drain_log) # type: ignore
         except Exception:
+            # The app's periodic drain picks up anything we failed to schedule
             pass
 
     def isatty(self) -> bool:
@@ -1,12 +1,18 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
 
-@dataclass
+@dataclass(slots=True)
 class Repo:
     project_name: str
     repo_name: str
     remote_url: str
     default_branch: Optional[str] = None
+    # Lowercased "project/repo" for filtering; always derived from the names
+    match_text: str = field(init=False, default="")
 
-    def match_text(self) -> str:
-        return f"{self.project_name}/{self.repo_name}".lower()
+    def __post_init__(self) -> None:
+        self.match_text = f"{self.project_name}/{self.repo_name}".lower()
+
+def repo_sort_key(repo: Repo) -> Tuple[str, str]:
+    """Table order: by project, then repo, case-insensitively."""
+    return (repo.project_name.lower(), repo.repo_name.lower())
@@ -1,14 +1,35 @@
-from urllib.parse import urlparse, urlunparse
+import re
+from functools import lru_cache
+from typing import Callable
+from urllib.parse import quote, urlparse, urlunparse
 
 MASK = "***"
 
-def mask_pat(text: str, pat: str) -> str:
+@lru_cache(maxsize=8)
+def make_masker(pat: str) -> Callable[[str], str]:
+    """Return a function that masks `pat` (raw or URL-encoded) in a single regex pass."""
     if not pat:
-        return text
-    return text.replace(pat, MASK)
+        return lambda text: text
+    variants = sorted({pat, quote(pat, safe="")}, key=len, reverse=True)
+    sub = re.compile("|".join(re.escape(v) for v in variants)).sub
+    return lambda text: sub(MASK, text)
+
+def mask_pat(text: str, pat: str) -> str:
+    return make_masker(pat)(text)
 
 def embed_pat_in_url(url: str, username: str, pat: str) -> str:
     """Embed PAT credentials into an https:// URL safely."""
+    # Fast path: splice credentials in directly when the authority has no userinfo yet
+    if url.startswith(("http://", "https://")):
+        start = url.find("://") + 3
+        end = len(url)
+        for sep in "/?#":
+            pos = url.find(sep, start)
+            if pos != -1 and pos < end:
+                end = pos
+        if "@" not in url[start:end]:
+            return f"{url[:start]}{username}:{pat}@{url[start:]}"
+
     parsed = urlparse(url)
     if parsed.scheme not in ("http", "https"):
         raise ValueError(f"Unsupported URL scheme: {parsed.scheme}")